@@ -1,7 +0,0 @@
-require('@babel/register')({
-  presets: [
-    '@babel/preset-react',
-    '@babel/preset-typescript'
-  ],
-  extensions: ['.js', '.jsx', '.ts', '.tsx'],
-});
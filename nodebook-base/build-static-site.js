@@ -106,24 +106,37 @@ async function buildStaticSite(progressCallback = () => {}) {
     const mainGraphImageBuffer = await renderGraphToPng(graph.nodes, publicRelations, progressCallback);
     await fs.writeFile(path.join(graphDir, 'graph.jpg'), mainGraphImageBuffer);
 
+    // Index nodes by id and relations by the nodes they touch in one pass, so
+    // each node's neighbourhood below is a lookup rather than a scan.
+    const nodesById = new Map(graph.nodes.map(n => [n.id, n]));
+    const relationsByNode = new Map();
+    const addRelationFor = (nodeId, rel) => {
+      const rels = relationsByNode.get(nodeId);
+      if (rels) rels.push(rel);
+      else relationsByNode.set(nodeId, [rel]);
+    };
+    for (const rel of graph.relations) {
+      addRelationFor(rel.source_id, rel);
+      if (rel.target_id !== rel.source_id) addRelationFor(rel.target_id, rel);
+    }
+
     let nodeCardsHtml = '';
     for (const node of graph.nodes) {
       progressCallback(`  - Generating image for node: ${node.name}`);
-      const subgraphNodesRaw = [node];
-      const subgraphRelationsRaw = graph.relations.filter(r => r.source_id === node.id || r.target_id === node.id);
-      
+      const subgraphNodes = new Map([[node.id, node]]);
+      const subgraphRelationsRaw = relationsByNode.get(node.id) || [];
+
       for (const rel of subgraphRelationsRaw) {
         const otherNodeId = rel.source_id === node.id ? rel.target_id : rel.source_id;
-        if (!subgraphNodesRaw.find(n => n.id === otherNodeId)) {
-          const otherNode = graph.nodes.find(n => n.id === otherNodeId);
-          if (otherNode) subgraphNodesRaw.push(otherNode);
+        if (!subgraphNodes.has(otherNodeId)) {
+          const otherNode = nodesById.get(otherNodeId);
+          if (otherNode) subgraphNodes.set(otherNodeId, otherNode);
         }
       }
-      
-      const subgraphNodeIds = new Set(subgraphNodesRaw.map(n => n.id));
-      const subgraphRelations = subgraphRelationsRaw.filter(r => subgraphNodeIds.has(r.source_id) && subgraphNodeIds.has(r.target_id));
 
-      const nodeImageBuffer = await renderGraphToPng(subgraphNodesRaw, subgraphRelations);
+      const subgraphRelations = subgraphRelationsRaw.filter(r => subgraphNodes.has(r.source_id) && subgraphNodes.has(r.target_id));
+
+      const nodeImageBuffer = await renderGraphToPng([...subgraphNodes.values()], subgraphRelations);
       await fs.writeFile(path.join(graphImagesDir, `${node.id}.jpg`), nodeImageBuffer);
       nodeCardsHtml += generateNodeCard(node);
     }
@@ -1,15 +1,9 @@
-const { getNodeCnl } = require('./graph-manager');
-const fs = require('fs');
+const fs = require('fs').promises;
+const os = require('os');
+const path = require('path');
+const GraphManager = require('./graph-manager');
 
-jest.mock('fs', () => ({
-  promises: {
-    readFile: jest.fn(),
-  },
-}));
-
-describe('cnl-parser water', () => {
-  it('should correctly extract the CNL for the "Water" node', async () => {
-    const sourceCnl = `# Hydrogen [Element]
+const sourceCnl = `# Hydrogen [Element]
 has number of protons: 1;
 has number of electrons: 1;
 has number of neutrons: 0;
@@ -72,7 +66,7 @@ has operator: "OR";
 # Flame [Energy]
 # Electricity [Energy]`;
 
-    const expectedWaterCnl = `# Water [Class]
+const expectedWaterCnl = `# Water [Class]
 \
 description
 Water is the elixir of life.
@@ -87,20 +81,46 @@ has chemical formula: $\\ce{H3O+}$;
 ## hydroxide
 has chemical formula: $\\ce{OH-}$;`;
 
-    fs.promises.readFile.mockImplementation((filePath) => {
-        if (filePath.endsWith('graph.cnl')) {
-            return Promise.resolve(sourceCnl);
-        }
-        if (filePath.endsWith('registry.json')) {
-            return Promise.resolve(JSON.stringify([{ id: 'test-graph', path: '/fake/path' }]));
-        }
-        if (filePath.endsWith('node_registry.json')) {
-            return Promise.resolve(JSON.stringify({ 'water-id': { base_name: 'Water' } }));
-        }
-        return Promise.reject(new Error(`Unexpected readFile call: ${filePath}`));
-    });
-
-    const cnl = await getNodeCnl('test-graph', 'water-id');
+// Node names containing regex syntax; "# axb" comes first so a heading match
+// that treated "." as a wildcard would pick the wrong block.
+const languagesCnl = `# axb
+has kind: "decoy";
+
+# a.b
+has kind: "dotted";
+
+# C++ [Language]
+has paradigm: "multi-paradigm";`;
+
+describe('cnl-parser water', () => {
+  let dataDir;
+  let graphManager;
+
+  // One graph manager and data directory shared by every test in the file.
+  beforeAll(async () => {
+    dataDir = await fs.mkdtemp(path.join(os.tmpdir(), 'nodebook-water-'));
+    graphManager = new GraphManager();
+    await graphManager.initialize(dataDir);
+    await graphManager.createGraph('test-graph');
+    await graphManager.saveCnl('test-graph', sourceCnl);
+    await graphManager.addNodeToRegistry({ id: 'water-id', base_name: 'Water' });
+    await graphManager.createGraph('languages');
+    await graphManager.saveCnl('languages', languagesCnl);
+    await graphManager.addNodeToRegistry({ id: 'cpp-id', base_name: 'C++' });
+    await graphManager.addNodeToRegistry({ id: 'dotted-id', base_name: 'a.b' });
+  });
+
+  afterAll(async () => {
+    await fs.rm(dataDir, { recursive: true, force: true });
+  });
+
+  it('should correctly extract the CNL for the "Water" node', async () => {
+    const cnl = await graphManager.getNodeCnl('test-graph', 'water-id');
     expect(cnl.trim()).toBe(expectedWaterCnl.trim());
   });
+
+  it('should extract the CNL for nodes whose names contain regex syntax', async () => {
+    expect(await graphManager.getNodeCnl('languages', 'cpp-id')).toBe('# C++ [Language]\nhas paradigm: "multi-paradigm";');
+    expect((await graphManager.getNodeCnl('languages', 'dotted-id')).trim()).toBe('# a.b\nhas kind: "dotted";');
+  });
 });
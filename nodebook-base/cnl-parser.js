@@ -2,11 +2,26 @@ const crypto = require('crypto');
 const schemaManager = require('./schema-manager');
 
 const HEADING_REGEX = /^\s*(#+)\s*(?:\*\*(.+?)\*\*\s*)?(.+?)(?:\s*\[(.+?)\])?$/;
-const RELATION_REGEX = /^\s*<(.+?)>\s*([\s\S]*?);/gm;
+// The target group stops at the first ';' and leaves out surrounding
+// whitespace, so each match is one relation with a ready-to-use target.
+const RELATION_REGEX = /^\s*<(.+?)>\s*([^;]*?)\s*;/gm;
 const ATTRIBUTE_REGEX = /^\s*has\s+([^:]+):\s*([\s\S]*?);/gm;
 const FUNCTION_REGEX = /^\s*has\s+function\s+\"([^\"]+)\"\s*;/gm;
 const DESCRIPTION_REGEX = /```description\n([\s\S]*?)\n```/;
 const GRAPH_DESCRIPTION_REGEX = /```graph-description\n([\s\S]*?)\n```/;
+// Used when turning names into ids; `replace` resets `lastIndex` on global
+// regexes, so sharing them across calls is safe.
+const NON_ID_RUN_REGEX = /[^a-z0-9-]+/g;
+const WHITESPACE_REGEX = /\s/;
+const WHITESPACE_RUN_REGEX = /\s+/g;
+
+// Lower-cases `text` into an id segment in a single pass: characters outside
+// [a-z0-9-] are dropped, and a run of them containing whitespace becomes one
+// '_'. Same result as stripping those characters and then collapsing
+// whitespace runs.
+function toIdSegment(text) {
+    return text.toLowerCase().replace(NON_ID_RUN_REGEX, run => (WHITESPACE_REGEX.test(run) ? '_' : ''));
+}
 
 function getOperationsFromCnl(cnlText) {
     if (!cnlText) {
@@ -15,14 +30,14 @@ function getOperationsFromCnl(cnlText) {
     const operations = [];
     const structuralTree = buildStructuralTree(cnlText);
 
-    const graphDescriptionMatch = cnlText.match(GRAPH_DESCRIPTION_REGEX);
+    const graphDescriptionMatch = cnlText.includes('```graph-description') && cnlText.match(GRAPH_DESCRIPTION_REGEX);
     if (graphDescriptionMatch) {
         const description = graphDescriptionMatch[1].trim();
         operations.push({ type: 'updateGraphDescription', payload: { description }, id: 'graph_description' });
     }
 
     for (const nodeBlock of structuralTree) {
-        const { id: nodeId, payload: nodePayload } = processNodeHeading(nodeBlock.heading);
+        const { id: nodeId, payload: nodePayload } = processNodeHeading(nodeBlock);
         operations.push({ type: 'addNode', payload: nodePayload, id: nodeId });
 
         const neighborhoodOps = processNeighborhood(nodeId, nodeBlock.content);
@@ -38,7 +53,7 @@ function getNodeOrderFromCnl(cnlText) {
     const ids = [];
     const structuralTree = buildStructuralTree(cnlText);
     for (const nodeBlock of structuralTree) {
-        const { id: nodeId } = processNodeHeading(nodeBlock.heading);
+        const { id: nodeId } = processNodeHeading(nodeBlock);
         ids.push(nodeId);
     }
     return ids;
@@ -75,24 +90,26 @@ async function diffCnl(oldCnl, newCnl) {
 
 async function validateOperations(operations) {
     const errors = [];
-    const nodeTypes = await schemaManager.getNodeTypes();
-    const relationTypes = await schemaManager.getRelationTypes();
-    const attributeTypes = await schemaManager.getAttributeTypes();
+    const {
+        nodeTypes: nodeTypeNames,
+        relationTypes: relationTypeNames,
+        attributeTypes: attributeTypeNames,
+    } = await schemaManager.getAllSchemaNames();
 
     for (const op of operations) {
         if (op.type === 'addNode') {
             const { role } = op.payload.options;
-            if (role !== 'individual' && !nodeTypes.find(nt => nt.name === role)) {
+            if (role !== 'individual' && !nodeTypeNames.has(role)) {
                 errors.push({ message: `Node type "${role}" is not defined in the schema.` });
             }
         } else if (op.type === 'addAttribute') {
             const { name } = op.payload;
-            if (!attributeTypes.find(at => at.name === name)) {
+            if (!attributeTypeNames.has(name)) {
                 errors.push({ message: `Attribute type "${name}" is not defined in the schema.` });
             }
         } else if (op.type === 'addRelation') {
             const { name } = op.payload;
-            if (!relationTypes.find(rt => rt.name === name)) {
+            if (!relationTypeNames.has(name)) {
                 errors.push({ message: `Relation type "${name}" is not defined in the schema.` });
             }
         }
@@ -106,10 +123,15 @@ function buildStructuralTree(cnlText) {
     const lines = cnlText.split('\n');
 
     for (const line of lines) {
-        if (!line.trim()) continue;
-        const headingMatch = line.match(HEADING_REGEX);
+        const trimmed = line.trim();
+        if (!trimmed) continue;
+        // Matched on the trimmed line, which is the heading text itself; the
+        // match is kept so the heading is not parsed a second time. Content
+        // lines, the common case, cannot match without a leading '#', so the
+        // regex is only run on lines that have one.
+        const headingMatch = trimmed[0] === '#' ? trimmed.match(HEADING_REGEX) : null;
         if (headingMatch) {
-            currentNodeBlock = { heading: line.trim(), content: [] };
+            currentNodeBlock = { heading: trimmed, headingMatch, content: [] };
             tree.push(currentNodeBlock);
         } else if (currentNodeBlock) {
             currentNodeBlock.content.push(line);
@@ -118,51 +140,81 @@ function buildStructuralTree(cnlText) {
     return tree;
 }
 
-function processNodeHeading(heading) {
-    const match = heading.match(HEADING_REGEX);
-    const [, , adjective, name, rolesString] = match;
+// Parsed headings keyed by heading text. A CNL save re-parses both the old
+// and the new text, and every graph fetch re-derives the node order, so the
+// same headings come through here over and over. Entries are plain data; the
+// cache is dropped wholesale once it reaches HEADING_CACHE_LIMIT.
+const HEADING_CACHE_LIMIT = 10000;
+const headingCache = new Map();
+
+function parseHeading(heading, match) {
+    const cached = headingCache.get(heading);
+    if (cached) return cached;
+
+    const [, , rawAdjective, rawName, rolesString] = match;
     const roles = rolesString ? rolesString.split(';').map(r => r.trim()).filter(Boolean) : ['individual'];
     const nodeType = roles[0] || 'individual';
-    const cleanName = name.trim().toLowerCase().replace(/[^a-z0-9\s-]/g, '').replace(/\s+/g, '_');
-    const cleanAdjective = adjective ? adjective.trim().toLowerCase().replace(/[^a-z0-9\s-]/g, '').replace(/\s+/g, '_') : null;
+    const baseName = rawName.trim();
+    const adjective = rawAdjective ? rawAdjective.trim() : null;
+    const cleanName = toIdSegment(baseName);
+    const cleanAdjective = adjective !== null ? toIdSegment(adjective) : null;
     const id = cleanAdjective ? `${cleanAdjective}_${cleanName}` : cleanName;
-    return { id, type: nodeType, payload: { base_name: name.trim(), options: { id, role: nodeType, parent_types: roles.slice(1), adjective: adjective ? adjective.trim() : null } } };
+    const parsed = { id, nodeType, baseName, parentTypes: roles.slice(1), adjective };
+
+    if (headingCache.size >= HEADING_CACHE_LIMIT) headingCache.clear();
+    headingCache.set(heading, parsed);
+    return parsed;
+}
+
+// Takes a block from buildStructuralTree, which has already matched the
+// heading against HEADING_REGEX.
+function processNodeHeading({ heading, headingMatch }) {
+    const { id, nodeType, baseName, parentTypes, adjective } = parseHeading(heading, headingMatch);
+    // Fresh payload objects per call: operations are handed to the graph,
+    // which keeps references to them (e.g. parent_types on the stored node).
+    return { id, type: nodeType, payload: { base_name: baseName, options: { id, role: nodeType, parent_types: [...parentTypes], adjective } } };
 }
 
 function processNeighborhood(nodeId, lines) {
     const neighborhoodOps = [];
     let content = lines.join('\n');
-    
-    const descriptionMatch = content.match(DESCRIPTION_REGEX);
+
+    // Each pattern below needs a literal ('```description', 'has', '<') that
+    // most blocks lack for at least one of them; checking for it first skips
+    // the regex scan entirely in that case.
+    const descriptionMatch = content.includes('```description') && content.match(DESCRIPTION_REGEX);
     if (descriptionMatch) {
         const description = descriptionMatch[1].trim();
-        const id = `attr_${nodeId}_description_${crypto.createHash('sha1').update(description).digest('hex').slice(0, 6)}`;
         neighborhoodOps.push({ type: 'updateNode', payload: { id: nodeId, fields: { description } }, id: `${nodeId}_description` });
-        content = content.replace(DESCRIPTION_REGEX, '').trim();
+        // Cut the block out using the match already in hand.
+        content = (content.slice(0, descriptionMatch.index) + content.slice(descriptionMatch.index + descriptionMatch[0].length)).trim();
     }
 
-    const attributeMatches = [...content.matchAll(ATTRIBUTE_REGEX)];
-    for (const match of attributeMatches) {
-        const [, name, value] = match;
-        const valueHash = crypto.createHash('sha1').update(String(value.trim())).digest('hex').slice(0, 6);
-        const id = `attr_${nodeId}_${name.trim().toLowerCase().replace(/\s+/g, '_')}_${valueHash}`;
-        neighborhoodOps.push({ type: 'addAttribute', payload: { source: nodeId, name: name.trim(), value: value.trim() }, id });
-    }
+    // matchAll is consumed lazily, one match at a time, rather than spread
+    // into an array of every match first.
+    if (content.includes('has')) {
+        for (const [, rawName, rawValue] of content.matchAll(ATTRIBUTE_REGEX)) {
+            const name = rawName.trim();
+            const value = rawValue.trim();
+            const valueHash = crypto.createHash('sha1').update(value).digest('hex').slice(0, 6);
+            const id = `attr_${nodeId}_${name.toLowerCase().replace(WHITESPACE_RUN_REGEX, '_')}_${valueHash}`;
+            neighborhoodOps.push({ type: 'addAttribute', payload: { source: nodeId, name, value }, id });
+        }
 
-    const functionMatches = [...content.matchAll(FUNCTION_REGEX)];
-    for (const match of functionMatches) {
-        const [, name] = match;
-        const id = `func_${nodeId}_${name.trim().toLowerCase().replace(/\s+/g, '_')}`;
-        neighborhoodOps.push({ type: 'applyFunction', payload: { source: nodeId, name: name.trim() }, id });
+        for (const [, rawName] of content.matchAll(FUNCTION_REGEX)) {
+            const name = rawName.trim();
+            const id = `func_${nodeId}_${name.toLowerCase().replace(WHITESPACE_RUN_REGEX, '_')}`;
+            neighborhoodOps.push({ type: 'applyFunction', payload: { source: nodeId, name }, id });
+        }
     }
 
-    const relationMatches = [...content.matchAll(RELATION_REGEX)];
-    for (const match of relationMatches) {
-        const [, relationName, targets] = match;
-        for (const target of targets.split(';').map(t => t.trim()).filter(Boolean)) {
-            const targetId = target.toLowerCase().replace(/[^a-z0-9\s-]/g, '').replace(/\s+/g, '_');
-            const id = `rel_${nodeId}_${relationName.trim().toLowerCase().replace(/\s+/g, '_')}_${targetId}`;
-            neighborhoodOps.push({ type: 'addRelation', payload: { source: nodeId, target: targetId, name: relationName.trim() }, id });
+    if (content.includes('<')) {
+        for (const [, relationName, target] of content.matchAll(RELATION_REGEX)) {
+            if (!target) continue;
+            const name = relationName.trim();
+            const targetId = toIdSegment(target);
+            const id = `rel_${nodeId}_${name.toLowerCase().replace(WHITESPACE_RUN_REGEX, '_')}_${targetId}`;
+            neighborhoodOps.push({ type: 'addRelation', payload: { source: nodeId, target: targetId, name }, id });
         }
     }
     
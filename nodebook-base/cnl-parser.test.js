@@ -15,6 +15,26 @@ describe('CNL Parser', () => {
     });
   });
 
+  describe('Line Handling', () => {
+    test('should recognise headings in CRLF input', async () => {
+      const { operations } = await diffCnl('', '# Node A\r\n  has name: "John Doe";\r\n# Node B [Person]\r\n');
+      const addNodeOps = operations.filter(op => op.type === 'addNode');
+      expect(addNodeOps.map(op => op.payload.base_name)).toEqual(['Node A', 'Node B']);
+      expect(addNodeOps[1].payload.options.role).toBe('Person');
+      const addAttributeOp = operations.find(op => op.type === 'addAttribute');
+      expect(addAttributeOp.payload.source).toBe('node_a');
+    });
+
+    test('should treat a "#" line with only whitespace after it as content', async () => {
+      const { operations } = await diffCnl('', '# Node A\n#   \n  has name: "John Doe";');
+      const addNodeOps = operations.filter(op => op.type === 'addNode');
+      expect(addNodeOps).toHaveLength(1);
+      expect(addNodeOps[0].id).toBe('node_a');
+      const addAttributeOp = operations.find(op => op.type === 'addAttribute');
+      expect(addAttributeOp.payload.source).toBe('node_a');
+    });
+  });
+
   describe('Attribute Parsing', () => {
     test('should create a simple attribute', async () => {
       const { operations } = await diffCnl('', '# My Node\n  has name: "John Doe";');
@@ -52,29 +72,35 @@ describe('CNL Parser', () => {
   });
 
   describe('Diffing and Deletion', () => {
-    test('should generate a delete operation for a removed node', async () => {
-      const oldCnl = '# Node A\n# Node B';
-      const newCnl = '# Node B';
+    // Each case drops one element from the old CNL and expects a delete
+    // operation for exactly that element.
+    test.each([
+      {
+        removed: 'node',
+        oldCnl: '# Node A\n# Node B',
+        newCnl: '# Node B',
+        type: 'deleteNode',
+        id: /^node_a$/,
+      },
+      {
+        removed: 'attribute',
+        oldCnl: '# Node A\n  has name: "John Doe";\n  has age: 30;',
+        newCnl: '# Node A\n  has name: "John Doe";',
+        type: 'deleteAttribute',
+        id: /^attr_node_a_age_/,
+      },
+      {
+        removed: 'relation',
+        oldCnl: '# Node A\n<knows> Node B;\n<likes> Node C;',
+        newCnl: '# Node A\n<knows> Node B;',
+        type: 'deleteRelation',
+        id: /^rel_node_a_likes_node_c$/,
+      },
+    ])('should generate a delete operation for a removed $removed', async ({ oldCnl, newCnl, type, id }) => {
       const { operations } = await diffCnl(oldCnl, newCnl);
-      const deleteNodeOp = operations.find(op => op.type === 'deleteNode');
-      expect(deleteNodeOp).toBeDefined();
-      expect(deleteNodeOp.payload.id).toBe('node_a');
-    });
-
-    test('should generate a delete operation for a removed attribute', async () => {
-        const oldCnl = '# Node A\n  has name: "John Doe";\n  has age: 30;';
-        const newCnl = '# Node A\n  has name: "John Doe";';
-        const { operations } = await diffCnl(oldCnl, newCnl);
-        const deleteAttributeOp = operations.find(op => op.type === 'deleteAttribute');
-        expect(deleteAttributeOp).toBeDefined();
-    });
-
-    test('should generate a delete operation for a removed relation', async () => {
-        const oldCnl = '# Node A\n<knows> Node B;\n<likes> Node C;';
-        const newCnl = '# Node A\n<knows> Node B;';
-        const { operations } = await diffCnl(oldCnl, newCnl);
-        const deleteRelationOp = operations.find(op => op.type === 'deleteRelation');
-        expect(deleteRelationOp).toBeDefined();
+      const deleteOp = operations.find(op => op.type === type);
+      expect(deleteOp).toBeDefined();
+      expect(deleteOp.payload.id).toMatch(id);
     });
   });
 });
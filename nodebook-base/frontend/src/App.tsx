@@ -83,9 +83,13 @@ function App() {
   };
 
   const fetchSchemas = () => {
-    fetch(`${API_BASE_URL}/api/schema/relations`).then(res => res.json()).then(data => setRelationTypes(data));
-    fetch(`${API_BASE_URL}/api/schema/attributes`).then(res => res.json()).then(data => setAttributeTypes(data));
-    fetch(`${API_BASE_URL}/api/schema/nodetypes`).then(res => res.json()).then(data => setNodeTypes(data));
+    fetch(`${API_BASE_URL}/api/schema/all`)
+      .then(res => res.json())
+      .then(data => {
+        setRelationTypes(data.relationTypes);
+        setAttributeTypes(data.attributeTypes);
+        setNodeTypes(data.nodeTypes);
+      });
   };
 
   useEffect(() => {
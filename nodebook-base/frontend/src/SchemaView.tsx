@@ -19,10 +19,14 @@ export function SchemaView({ onSchemaChange }: SchemaViewProps) {
   const [editingItem, setEditingItem] = useState<any | null>(null);
 
   const fetchAllSchemas = () => {
-    fetch(`${API_BASE_URL}/api/schema/nodetypes`).then(res => res.json()).then(setNodeTypes);
-    fetch(`${API_BASE_URL}/api/schema/relations`).then(res => res.json()).then(setRelationTypes);
-    fetch(`${API_BASE_URL}/api/schema/attributes`).then(res => res.json()).then(setAttributeTypes);
-    fetch(`${API_BASE_URL}/api/schema/functions`).then(res => res.json()).then(setFunctionTypes);
+    fetch(`${API_BASE_URL}/api/schema/all`)
+      .then(res => res.json())
+      .then(data => {
+        setNodeTypes(data.nodeTypes);
+        setRelationTypes(data.relationTypes);
+        setAttributeTypes(data.attributeTypes);
+        setFunctionTypes(data.functionTypes);
+      });
   };
 
   useEffect(() => {
@@ -1,32 +1,51 @@
 const fsp = require('fs').promises;
 const path = require('path');
+const { readJsonFile, writeJsonFile } = require('./json-file');
 
 const DEBUG_LOG_FILE = '/tmp/nodebook-debug.log';
 
+// Debug tracing is opt-in (NODEBOOK_DEBUG=1): registry reads happen on nearly
+// every request, and each traced call is a file append.
+const DEBUG_ENABLED = process.env.NODEBOOK_DEBUG === '1';
+
 // Helper function for logging
-const logDebug = (message) => {
-    // Use fs.promises.appendFile for async logging
-    fsp.appendFile(DEBUG_LOG_FILE, `[${new Date().toISOString()}] ${message}\n`).catch(console.error);
-};
+const logDebug = DEBUG_ENABLED
+    ? (message) => {
+        // Use fs.promises.appendFile for async logging
+        fsp.appendFile(DEBUG_LOG_FILE, `[${new Date().toISOString()}] ${message}\n`).catch(console.error);
+    }
+    : () => {};
 
-// Clear the log file at the start of the module load
-fsp.writeFile(DEBUG_LOG_FILE, '').catch(console.error);
+if (DEBUG_ENABLED) {
+    // Clear the log file at the start of the module load
+    fsp.writeFile(DEBUG_LOG_FILE, '').catch(console.error);
+}
 logDebug('GraphManager module loaded.');
 
 
 // --- Helper Functions ---
-async function readJsonFile(file) {
+
+// Parsed registry files keyed by path; see readJsonFile. Callers get the
+// cached object itself, which other requests share. It may only be changed in
+// place between reading it and starting the save, with no await in between;
+// graph registry changes that follow other async work go through
+// GraphManager#updateGraphRegistry instead.
+const jsonCache = new Map();
+
+// Creates `file` with `data` unless it already exists, without a separate
+// existence check.
+async function initJsonFile(file, data) {
     try {
-        const data = await fsp.readFile(file, 'utf-8');
-        return JSON.parse(data);
+        await fsp.writeFile(file, JSON.stringify(data, null, 2), { flag: 'wx' });
     } catch (error) {
-        if (error.code === 'ENOENT') return null;
-        throw error;
+        if (error.code !== 'EEXIST') throw error;
     }
 }
 
-async function writeJsonFile(file, data) {
-    await fsp.writeFile(file, JSON.stringify(data, null, 2));
+// Registry entry as sent to clients: everything except the server-side
+// storage path, which the frontend never uses.
+function toPublicGraph({ path: storagePath, ...graph }) {
+    return graph;
 }
 
 class GraphManager {
@@ -35,6 +54,12 @@ class GraphManager {
         this.REGISTRY_FILE = null;
         this.NODE_REGISTRY_FILE = null;
         this.activeGraphs = new Map();
+        // Serialized public graph list and the registry object it was built
+        // from; see getGraphListJson.
+        this.graphListJson = null;
+        this.graphListSource = null;
+        // Tail of the queue of graph registry updates; see updateGraphRegistry.
+        this.registryUpdates = Promise.resolve();
         logDebug('GraphManager instance created.');
     }
 
@@ -45,48 +70,60 @@ class GraphManager {
         this.NODE_REGISTRY_FILE = path.join(this.DATA_DIR, 'node_registry.json');
 
         await fsp.mkdir(this.DATA_DIR, { recursive: true });
-        try {
-            await fsp.access(this.REGISTRY_FILE);
-        } catch {
-            await writeJsonFile(this.REGISTRY_FILE, []);
-        }
-        try {
-            await fsp.access(this.NODE_REGISTRY_FILE);
-        } catch {
-            await writeJsonFile(this.NODE_REGISTRY_FILE, {});
-        }
+        await Promise.all([
+            initJsonFile(this.REGISTRY_FILE, []),
+            initJsonFile(this.NODE_REGISTRY_FILE, {}),
+        ]);
     }
 
     async getGraphRegistry() {
         logDebug(`Getting graph registry from: ${this.REGISTRY_FILE}`);
-        const registry = await readJsonFile(this.REGISTRY_FILE);
+        const registry = await readJsonFile(this.REGISTRY_FILE, jsonCache);
         return registry || [];
     }
 
     async saveGraphRegistry(registry) {
-        logDebug(`Saving graph registry to: ${this.REGISTRY_FILE}`);
-        logDebug(`Registry contents to be saved: ${JSON.stringify(registry, null, 2)}`);
-        await writeJsonFile(this.REGISTRY_FILE, registry);
+        this.graphListJson = null;
+        logDebug(`Saving graph registry (${registry.length} graphs) to: ${this.REGISTRY_FILE}`);
+        await writeJsonFile(this.REGISTRY_FILE, registry, jsonCache);
         logDebug(`Finished saving graph registry to: ${this.REGISTRY_FILE}`);
     }
 
-    async updateGraphMetadata(graphId, metadata) {
+    // Runs `update` on the current graph registry and saves the registry it
+    // returns, one update at a time, so concurrent requests neither save over
+    // each other's changes nor edit entries by stale positions. `update` must
+    // not mutate the registry it is given; returning undefined skips the save.
+    updateGraphRegistry(update) {
+        const run = this.registryUpdates.then(async () => {
+            const updated = update(await this.getGraphRegistry());
+            if (updated !== undefined) {
+                await this.saveGraphRegistry(updated);
+            }
+            return updated;
+        });
+        this.registryUpdates = run.catch(() => {});
+        return run;
+    }
+
+    // JSON body for the graph list, serialized once and reused until the
+    // registry is saved here or replaced on disk (which yields a new object
+    // from readJsonFile).
+    async getGraphListJson() {
         const registry = await this.getGraphRegistry();
-        const graphIndex = registry.findIndex(g => g.id === graphId);
-        if (graphIndex === -1) {
-            throw new Error('Graph not found.');
+        if (this.graphListJson === null || this.graphListSource !== registry) {
+            this.graphListJson = JSON.stringify(registry.map(toPublicGraph));
+            this.graphListSource = registry;
         }
-        registry[graphIndex] = { ...registry[graphIndex], ...metadata, updatedAt: new Date().toISOString() };
-        await this.saveGraphRegistry(registry);
+        return this.graphListJson;
     }
 
     async getNodeRegistry() {
-        const registry = await readJsonFile(this.NODE_REGISTRY_FILE);
+        const registry = await readJsonFile(this.NODE_REGISTRY_FILE, jsonCache);
         return registry || {};
     }
 
     async saveNodeRegistry(registry) {
-        await writeJsonFile(this.NODE_REGISTRY_FILE, registry);
+        await writeJsonFile(this.NODE_REGISTRY_FILE, registry, jsonCache);
     }
 
     async addNodeToRegistry(node) {
@@ -110,6 +147,33 @@ class GraphManager {
         }
     }
 
+    // Applies a batch of registry changes with a single read and at most one
+    // write: adds entries for `newNodes` that are not registered yet, then
+    // records `graphId` on every registered node in `nodeIds`.
+    async registerNodesInGraph(graphId, nodeIds, newNodes = []) {
+        const registry = await this.getNodeRegistry();
+        let modified = false;
+        for (const node of newNodes) {
+            if (!registry[node.id]) {
+                registry[node.id] = {
+                    base_name: node.base_name,
+                    description: node.description,
+                    graph_ids: [],
+                };
+                modified = true;
+            }
+        }
+        for (const nodeId of nodeIds) {
+            if (registry[nodeId] && !registry[nodeId].graph_ids.includes(graphId)) {
+                registry[nodeId].graph_ids.push(graphId);
+                modified = true;
+            }
+        }
+        if (modified) {
+            await this.saveNodeRegistry(registry);
+        }
+    }
+
     async unregisterGraphFromRegistry(graphId) {
         const registry = await this.getNodeRegistry();
         let modified = false;
@@ -122,6 +186,7 @@ class GraphManager {
             }
             if (node.graph_ids.length === 0) {
                 delete registry[nodeId];
+                modified = true;
             }
         }
         if (modified) {
@@ -150,8 +215,12 @@ class GraphManager {
             createdAt: now,
             updatedAt: now,
         };
-        registry.push(newGraphInfo);
-        await this.saveGraphRegistry(registry);
+        await this.updateGraphRegistry(current => {
+            if (current.some(g => g.id === id)) {
+                throw new Error('Graph with this name already exists.');
+            }
+            return [...current, newGraphInfo];
+        });
         return newGraphInfo;
     }
 
@@ -191,8 +260,9 @@ class GraphManager {
         const nodeRegistry = await this.getNodeRegistry();
         const nodeInfo = nodeRegistry[nodeId];
         if (!nodeInfo) return '';
-        const nodeName = nodeInfo.base_name;
-        const nodeNameRegex = new RegExp(`^# ${nodeName}`);
+        // Literal prefix test: no per-call RegExp, and names containing regex
+        // syntax (e.g. "C++") match as written.
+        const nodeHeading = `# ${nodeInfo.base_name}`;
         for (const line of lines) {
             const isTopLevelHeader = line.startsWith('# ');
             if (inNodeBlock) {
@@ -202,7 +272,7 @@ class GraphManager {
                 nodeCnlLines.push(line);
             } else {
                 if (isTopLevelHeader) {
-                    if (nodeNameRegex.test(line)) {
+                    if (line.startsWith(nodeHeading)) {
                         inNodeBlock = true;
                         nodeCnlLines.push(line);
                     }
@@ -212,26 +282,34 @@ class GraphManager {
         return nodeCnlLines.join('\n');
     }
 
-    async saveCnl(graphId, cnlText) {
+    // Saves the CNL and applies `metadata` (e.g. a new description) to the
+    // graph's registry entry, refreshing updatedAt, with a single registry
+    // write. The entry is looked up again by id once the CNL is on disk; if
+    // the graph was deleted meanwhile, the registry is left alone.
+    async saveCnl(graphId, cnlText, metadata = {}) {
         const registry = await this.getGraphRegistry();
         const graphInfo = registry.find(g => g.id === graphId);
         if (!graphInfo) throw new Error('Graph not found.');
         const cnlPath = path.join(graphInfo.path, 'graph.cnl');
         await fsp.writeFile(cnlPath, cnlText);
-        await this.updateGraphMetadata(graphId, {});
+        await this.updateGraphRegistry(current => {
+            const graphIndex = current.findIndex(g => g.id === graphId);
+            if (graphIndex === -1) return undefined;
+            const updated = [...current];
+            updated[graphIndex] = { ...current[graphIndex], ...metadata, updatedAt: new Date().toISOString() };
+            return updated;
+        });
     }
 
     async deleteGraph(id) {
         const registry = await this.getGraphRegistry();
-        const graphIndex = registry.findIndex(g => g.id === id);
-        if (graphIndex === -1) {
+        const graphInfo = registry.find(g => g.id === id);
+        if (!graphInfo) {
             throw new Error('Graph not found.');
         }
         await this.unregisterGraphFromRegistry(id);
-        const graphInfo = registry[graphIndex];
         await fsp.rm(graphInfo.path, { recursive: true, force: true });
-        registry.splice(graphIndex, 1);
-        await this.saveGraphRegistry(registry);
+        await this.updateGraphRegistry(current => current.filter(g => g.id !== id));
         if (this.activeGraphs.has(id)) {
             const graph = this.activeGraphs.get(id);
             await graph.leaveSwarm();
@@ -241,3 +319,4 @@ class GraphManager {
 }
 
 module.exports = GraphManager;
+module.exports.toPublicGraph = toPublicGraph;
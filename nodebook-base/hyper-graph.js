@@ -78,8 +78,8 @@ class HyperGraph {
       throw new Error('One or both nodes in the relation do not exist.');
     }
     const relation = new RelationNode(source_id, target_id, name, options);
-    await this.db.put(`relations/${relation.id}`, relation);
 
+    // Attach the morph before storing, so the relation is written once.
     const morphName = options.morph || 'basic';
     const morph = sourceNode.morphs.find(m => m.name === morphName);
     if (morph) {
@@ -88,8 +88,8 @@ class HyperGraph {
         await this.updateNode(source_id, { morphs: sourceNode.morphs });
       }
       relation.morph_ids.push(morph.morph_id);
-      await this.db.put(`relations/${relation.id}`, relation);
     }
+    await this.db.put(`relations/${relation.id}`, relation);
     return relation;
   }
 
@@ -102,22 +102,45 @@ class HyperGraph {
   }
   
   async addAttribute(source_id, attributeName, attributeValue, options = {}) {
+    const [attribute] = await this.addAttributes(source_id, [{ name: attributeName, value: attributeValue, options }]);
+    return attribute;
+  }
+
+  // Adds several attributes to one node with a single node read and a single
+  // Hyperbee batch, rather than a read and up to two writes per attribute.
+  // Each entry is { name, value, options }, as for addAttribute.
+  async addAttributes(source_id, attributes) {
     const sourceNode = await this.getNode(source_id);
     if (!sourceNode) throw new Error(`Source node ${source_id} not found.`);
-    const attribute = new AttributeNode(source_id, attributeName, attributeValue, options);
-    await this.db.put(`attributes/${attribute.id}`, attribute);
-
-    const morphName = options.morph || 'basic';
-    const morph = sourceNode.morphs.find(m => m.name === morphName);
-    if (morph) {
-        if (!morph.attributeNode_ids.includes(attribute.id)) {
+    const batch = this.db.batch();
+    const added = [];
+    let morphsChanged = false;
+    try {
+      for (const { name, value, options = {} } of attributes) {
+        const attribute = new AttributeNode(source_id, name, value, options);
+        const morphName = options.morph || 'basic';
+        const morph = sourceNode.morphs.find(m => m.name === morphName);
+        if (morph) {
+          if (!morph.attributeNode_ids.includes(attribute.id)) {
             morph.attributeNode_ids.push(attribute.id);
-            await this.updateNode(source_id, { morphs: sourceNode.morphs });
+            morphsChanged = true;
+          }
+          attribute.morph_ids.push(morph.morph_id);
         }
-        attribute.morph_ids.push(morph.morph_id);
-        await this.db.put(`attributes/${attribute.id}`, attribute);
+        await batch.put(`attributes/${attribute.id}`, attribute);
+        added.push(attribute);
+      }
+      if (morphsChanged) {
+        await batch.put(`nodes/${source_id}`, sourceNode);
+      }
+      await batch.flush();
+    } catch (error) {
+      // An unflushed batch holds the db's write lock; release it so later
+      // writes to this graph are not blocked behind it.
+      await batch.close();
+      throw error;
     }
-    return attribute;
+    return added;
   }
 
   async deleteAttribute(id) {
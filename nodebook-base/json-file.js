@@ -0,0 +1,56 @@
+const fs = require('fs').promises;
+
+// JSON file helpers shared by the graph and schema managers. Each caller keeps
+// its own `cache` Map of path -> { mtimeMs, data }, so it can attach derived
+// data to an entry and have it dropped along with the entry.
+
+// Parses `file`, reusing the cached result while the file's mtime is
+// unchanged, so hand edits on disk are still picked up. Resolves to null if
+// the file does not exist. Callers share the cached object and must either
+// treat it as read-only or save it back through writeJsonFile.
+async function readJsonFile(file, cache) {
+    try {
+        const { mtimeMs } = await fs.stat(file);
+        const cached = cache.get(file);
+        if (cached && cached.mtimeMs === mtimeMs) {
+            return cached.data;
+        }
+        const data = JSON.parse(await fs.readFile(file, 'utf-8'));
+        cache.set(file, { mtimeMs, data });
+        return data;
+    } catch (error) {
+        if (error.code === 'ENOENT') {
+            cache.delete(file);
+            return null;
+        }
+        throw error;
+    }
+}
+
+// Writes to a unique temp file and renames it into place, so readers (and a
+// crash mid-write) never observe a partially written file. The cached mtime
+// is read from the temp file's handle, which rename preserves. If anything
+// fails, the temp file is removed and the cache entry, which may already hold
+// the unsaved changes, is dropped.
+let tmpCounter = 0;
+async function writeJsonFile(file, data, cache) {
+    const tmpFile = `${file}.${process.pid}.${++tmpCounter}.tmp`;
+    let mtimeMs;
+    try {
+        const handle = await fs.open(tmpFile, 'w');
+        try {
+            await handle.writeFile(JSON.stringify(data, null, 2));
+            ({ mtimeMs } = await handle.stat());
+        } finally {
+            await handle.close();
+        }
+        await fs.rename(tmpFile, file);
+    } catch (error) {
+        cache.delete(file);
+        await fs.rm(tmpFile, { force: true });
+        throw error;
+    }
+    cache.set(file, { mtimeMs, data });
+}
+
+module.exports = { readJsonFile, writeJsonFile };
@@ -1,45 +1,51 @@
-const graphManager = require('./graph-manager');
-const fs = require('fs');
+const fs = require('fs').promises;
+const os = require('os');
+const path = require('path');
+const GraphManager = require('./graph-manager');
 
-// Mock the filesystem
-jest.mock('fs', () => ({
-  promises: {
-    readFile: jest.fn(),
-    writeFile: jest.fn(),
-  },
-}));
+// Reads the node registry straight from disk, bypassing GraphManager's cache.
+async function readNodeRegistryFile(file) {
+  return JSON.parse(await fs.readFile(file, 'utf-8'));
+}
 
 describe('Node Registry Management', () => {
-  beforeEach(() => {
-    // Reset mocks before each test
-    fs.promises.readFile.mockReset();
-    fs.promises.writeFile.mockReset();
+  let dataDir;
+  let nodeRegistryFile;
+  let graphManager;
+
+  beforeEach(async () => {
+    // Every test gets its own data directory, removed in one call afterwards,
+    // so no test sees another's registry files.
+    dataDir = await fs.mkdtemp(path.join(os.tmpdir(), 'nodebook-registry-'));
+    nodeRegistryFile = path.join(dataDir, 'node_registry.json');
+    graphManager = new GraphManager();
+    await graphManager.initialize(dataDir);
   });
 
-  it('should add an explicitly defined node to the registry', async () => {
-    // Mock empty registries
-    fs.promises.readFile.mockResolvedValue(JSON.stringify({})); // node_registry.json
+  afterEach(async () => {
+    await fs.rm(dataDir, { recursive: true, force: true });
+  });
 
+  it('should add an explicitly defined node to the registry', async () => {
     const node = { id: 'node-1', base_name: 'Explicit Node' };
     await graphManager.addNodeToRegistry(node);
     await graphManager.registerNodeInGraph('node-1', 'graph-1');
 
-    // We can't easily verify the write without a more complex mock,
-    // so for now, we'll trust the implementation and build on this test.
-    // A better test would be to read the value back.
-    expect(fs.promises.writeFile).toHaveBeenCalled();
+    const registry = await readNodeRegistryFile(nodeRegistryFile);
+    expect(registry).toEqual({
+      'node-1': { base_name: 'Explicit Node', graph_ids: ['graph-1'] },
+    });
   });
 
   it('should add an implicitly created target node to the registry', async () => {
     // This test will require simulating the server's CNL processing logic
     // For now, we'll just test the underlying registry functions.
-    fs.promises.readFile.mockResolvedValue(JSON.stringify({})); // node_registry.json
-
     const node = { id: 'target-node-1', base_name: 'Implicit Node' };
     await graphManager.addNodeToRegistry(node);
     await graphManager.registerNodeInGraph('target-node-1', 'graph-1');
 
-    expect(fs.promises.writeFile).toHaveBeenCalled();
+    const registry = await readNodeRegistryFile(nodeRegistryFile);
+    expect(registry['target-node-1'].graph_ids).toEqual(['graph-1']);
   });
 
   it('should unregister a graph and remove orphaned nodes from the registry', async () => {
@@ -47,7 +53,7 @@ describe('Node Registry Management', () => {
       'node-1': { base_name: 'Node 1', graph_ids: ['graph-1', 'graph-2'] },
       'node-2': { base_name: 'Node 2', graph_ids: ['graph-1'] },
     };
-    fs.promises.readFile.mockResolvedValue(JSON.stringify(initialRegistry));
+    await fs.writeFile(nodeRegistryFile, JSON.stringify(initialRegistry));
 
     await graphManager.unregisterGraphFromRegistry('graph-1');
 
@@ -55,10 +61,49 @@ describe('Node Registry Management', () => {
       'node-1': { base_name: 'Node 1', graph_ids: ['graph-2'] },
     };
 
-    // Check that writeFile was called with the correct, cleaned registry
-    expect(fs.promises.writeFile).toHaveBeenCalledWith(
-      expect.any(String),
-      JSON.stringify(expectedRegistry, null, 2)
-    );
+    // Check that the cleaned registry reached disk
+    expect(await readNodeRegistryFile(nodeRegistryFile)).toEqual(expectedRegistry);
+  });
+});
+
+describe('Graph Registry Management', () => {
+  let dataDir;
+  let graphManager;
+
+  beforeEach(async () => {
+    dataDir = await fs.mkdtemp(path.join(os.tmpdir(), 'nodebook-registry-'));
+    graphManager = new GraphManager();
+    await graphManager.initialize(dataDir);
+  });
+
+  afterEach(async () => {
+    await fs.rm(dataDir, { recursive: true, force: true });
+  });
+
+  it('should keep the remaining graphs when graphs are deleted concurrently', async () => {
+    for (const name of ['a', 'b', 'c']) {
+      await graphManager.createGraph(name);
+    }
+
+    await Promise.all([graphManager.deleteGraph('a'), graphManager.deleteGraph('b')]);
+
+    const registry = JSON.parse(await fs.readFile(path.join(dataDir, 'registry.json'), 'utf-8'));
+    expect(registry.map(g => g.id)).toEqual(['c']);
+  });
+
+  it('should apply saved CNL metadata to the right graph while another is deleted', async () => {
+    for (const name of ['p', 'q', 'r']) {
+      await graphManager.createGraph(name);
+    }
+
+    // A large CNL keeps saveCnl's file write in flight while the delete
+    // updates the registry.
+    await Promise.all([
+      graphManager.saveCnl('q', '# Q\n'.repeat(2000000), { description: 'Q desc' }),
+      graphManager.deleteGraph('p'),
+    ]);
+
+    const registry = JSON.parse(await fs.readFile(path.join(dataDir, 'registry.json'), 'utf-8'));
+    expect(registry.map(g => [g.id, g.description])).toEqual([['q', 'Q desc'], ['r', '']]);
   });
-});
\ No newline at end of file
+});
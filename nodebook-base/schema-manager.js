@@ -1,5 +1,5 @@
-const fs = require('fs').promises;
 const path = require('path');
+const { readJsonFile, writeJsonFile } = require('./json-file');
 
 const SCHEMA_DIR = path.join(__dirname, 'schemas');
 const RELATION_TYPES_FILE = path.join(SCHEMA_DIR, 'relation_types.json');
@@ -7,146 +7,163 @@ const ATTRIBUTE_TYPES_FILE = path.join(SCHEMA_DIR, 'attribute_types.json');
 const NODE_TYPES_FILE = path.join(SCHEMA_DIR, 'node_types.json');
 const FUNCTION_TYPES_FILE = path.join(SCHEMA_DIR, 'function_types.json');
 
+// Parsed schema files keyed by path; see readJsonFile. Lists handed out from
+// here are shared and must be treated as read-only; the CRUD helpers copy
+// before mutating.
+const schemaCache = new Map();
+
 async function readSchema(file) {
-    try {
-        const data = await fs.readFile(file, 'utf-8');
-        return JSON.parse(data);
-    } catch (error) {
-        if (error.code === 'ENOENT') return [];
-        throw error;
-    }
+    return (await readJsonFile(file, schemaCache)) || [];
 }
 
-async function writeSchema(file, data) {
-    await fs.writeFile(file, JSON.stringify(data, null, 2));
+async function writeSchema(file, types) {
+    await writeJsonFile(file, types, schemaCache);
 }
 
-// --- Node Types ---
-
-async function getNodeTypes() {
-    return await readSchema(NODE_TYPES_FILE);
-}
-
-// --- Relation Types ---
-
-async function getRelationTypes() {
-    return await readSchema(RELATION_TYPES_FILE);
-}
-
-async function addRelationType(type) {
-    const types = await getRelationTypes();
-    if (types.find(t => t.name === type.name)) {
-        throw new Error('Relation type with this name already exists.');
+// Derived views of a schema file (name sets, name -> index maps) are built
+// once per cached version of the file and dropped along with it when the
+// file changes. Resolves to [types, view].
+async function readSchemaView(file, view, build) {
+    const types = await readSchema(file);
+    const cached = schemaCache.get(file);
+    if (!cached || cached.data !== types) {
+        return [types, build(types)];
     }
-    types.push(type);
-    await writeSchema(RELATION_TYPES_FILE, types);
-    return type;
-}
-
-async function updateRelationType(name, updatedType) {
-    let types = await getRelationTypes();
-    const index = types.findIndex(t => t.name === name);
-    if (index === -1) {
-        throw new Error('Relation type not found.');
+    if (!cached[view]) {
+        cached[view] = build(types);
     }
-    types[index] = updatedType;
-    await writeSchema(RELATION_TYPES_FILE, types);
-    return updatedType;
+    return [types, cached[view]];
 }
 
-async function deleteRelationType(name) {
-    let types = await getRelationTypes();
-    const filteredTypes = types.filter(t => t.name !== name);
-    if (types.length === filteredTypes.length) {
-        throw new Error('Relation type not found.');
-    }
-    await writeSchema(RELATION_TYPES_FILE, filteredTypes);
+// Set of type names, so membership checks (e.g. CNL validation) do no
+// per-call work.
+async function readSchemaNames(file) {
+    const [, names] = await readSchemaView(file, 'names', types => new Set(types.map(t => t.name)));
+    return names;
 }
 
-// --- Attribute Types ---
+// Name -> type entry, for callers that look types up by name (e.g. function
+// types when evaluating derived attributes). The first entry wins, matching
+// Array.prototype.find. Treat the entries as read-only.
+async function readSchemaByName(file) {
+    const [, byName] = await readSchemaView(file, 'byName', types => {
+        const map = new Map();
+        for (const t of types) {
+            if (!map.has(t.name)) map.set(t.name, t);
+        }
+        return map;
+    });
+    return byName;
+}
 
-async function getAttributeTypes() {
-    return await readSchema(ATTRIBUTE_TYPES_FILE);
+// --- Shared CRUD helpers ---
+
+// Maps each type name to its position in the list so create/update/delete
+// resolve a name with one hash lookup instead of scanning the list. Cached
+// with the parsed file through readSchemaView.
+function indexByName(types) {
+    const index = new Map();
+    types.forEach((t, i) => {
+        if (!index.has(t.name)) index.set(t.name, i);
+    });
+    return index;
 }
 
-async function addAttributeType(type) {
-    const types = await getAttributeTypes();
-    if (types.find(t => t.name === type.name)) {
-        throw new Error('Attribute type with this name already exists.');
+async function addSchemaType(file, label, type) {
+    const [cachedTypes, index] = await readSchemaView(file, 'index', indexByName);
+    if (index.has(type.name)) {
+        throw new Error(`${label} type with this name already exists.`);
     }
+    const types = [...cachedTypes];
     types.push(type);
-    await writeSchema(ATTRIBUTE_TYPES_FILE, types);
+    await writeSchema(file, types);
     return type;
 }
 
-async function updateAttributeType(name, updatedType) {
-    let types = await getAttributeTypes();
-    const index = types.findIndex(t => t.name === name);
-    if (index === -1) {
-        throw new Error('Attribute type not found.');
+async function updateSchemaType(file, label, name, updatedType) {
+    const [cachedTypes, index] = await readSchemaView(file, 'index', indexByName);
+    const position = index.get(name);
+    if (position === undefined) {
+        throw new Error(`${label} type not found.`);
     }
-    types[index] = updatedType;
-    await writeSchema(ATTRIBUTE_TYPES_FILE, types);
+    const types = [...cachedTypes];
+    types[position] = updatedType;
+    await writeSchema(file, types);
     return updatedType;
 }
 
-async function deleteAttributeType(name) {
-    let types = await getAttributeTypes();
-    const filteredTypes = types.filter(t => t.name !== name);
-    if (types.length === filteredTypes.length) {
-        throw new Error('Attribute type not found.');
+async function deleteSchemaType(file, label, name) {
+    const [cachedTypes, index] = await readSchemaView(file, 'index', indexByName);
+    if (!index.has(name)) {
+        throw new Error(`${label} type not found.`);
     }
-    await writeSchema(ATTRIBUTE_TYPES_FILE, filteredTypes);
+    // Drops every entry with this name, including hand-edited duplicates.
+    await writeSchema(file, cachedTypes.filter(t => t.name !== name));
 }
 
-// --- Function Types ---
-
-async function getFunctionTypes() {
-    return await readSchema(FUNCTION_TYPES_FILE);
+// --- Per-kind CRUD ---
+
+// Builds the get/add/update/remove operations for one schema file, so every
+// kind shares the same implementation and only differs by file and label.
+function schemaCrud(file, label) {
+    return {
+        get: () => readSchema(file),
+        byName: () => readSchemaByName(file),
+        add: type => addSchemaType(file, label, type),
+        update: (name, updatedType) => updateSchemaType(file, label, name, updatedType),
+        remove: name => deleteSchemaType(file, label, name),
+    };
 }
 
-async function addFunctionType(type) {
-    const types = await getFunctionTypes();
-    if (types.find(t => t.name === type.name)) {
-        throw new Error('Function type with this name already exists.');
-    }
-    types.push(type);
-    await writeSchema(FUNCTION_TYPES_FILE, types);
-    return type;
+const SCHEMA_FILES = {
+    nodeTypes: NODE_TYPES_FILE,
+    relationTypes: RELATION_TYPES_FILE,
+    attributeTypes: ATTRIBUTE_TYPES_FILE,
+    functionTypes: FUNCTION_TYPES_FILE,
+};
+
+const nodeTypes = schemaCrud(NODE_TYPES_FILE, 'Node');
+const relationTypes = schemaCrud(RELATION_TYPES_FILE, 'Relation');
+const attributeTypes = schemaCrud(ATTRIBUTE_TYPES_FILE, 'Attribute');
+const functionTypes = schemaCrud(FUNCTION_TYPES_FILE, 'Function');
+
+// --- All Types ---
+
+// Runs `read` over every schema file concurrently, keyed like SCHEMA_FILES.
+async function readAllSchemas(read) {
+    const kinds = Object.keys(SCHEMA_FILES);
+    const results = await Promise.all(kinds.map(kind => read(SCHEMA_FILES[kind])));
+    return Object.fromEntries(kinds.map((kind, i) => [kind, results[i]]));
 }
 
-async function updateFunctionType(name, updatedType) {
-    let types = await getFunctionTypes();
-    const index = types.findIndex(t => t.name === name);
-    if (index === -1) {
-        throw new Error('Function type not found.');
-    }
-    types[index] = updatedType;
-    await writeSchema(FUNCTION_TYPES_FILE, types);
-    return updatedType;
+// Loads every schema kind in one pass for callers that need more than one.
+async function getAllSchemas() {
+    return await readAllSchemas(readSchema);
 }
 
-async function deleteFunctionType(name) {
-    let types = await getFunctionTypes();
-    const filteredTypes = types.filter(t => t.name !== name);
-    if (types.length === filteredTypes.length) {
-        throw new Error('Function type not found.');
-    }
-    await writeSchema(FUNCTION_TYPES_FILE, filteredTypes);
+// Name sets for every schema kind; treat them as read-only.
+async function getAllSchemaNames() {
+    return await readAllSchemas(readSchemaNames);
 }
 
 module.exports = {
-    getNodeTypes,
-    getRelationTypes,
-    addRelationType,
-    updateRelationType,
-    deleteRelationType,
-    getAttributeTypes,
-    addAttributeType,
-    updateAttributeType,
-    deleteAttributeType,
-    getFunctionTypes,
-    addFunctionType,
-    updateFunctionType,
-    deleteFunctionType,
+    getAllSchemas,
+    getAllSchemaNames,
+    relationTypes,
+    attributeTypes,
+    functionTypes,
+    getNodeTypes: nodeTypes.get,
+    getRelationTypes: relationTypes.get,
+    addRelationType: relationTypes.add,
+    updateRelationType: relationTypes.update,
+    deleteRelationType: relationTypes.remove,
+    getAttributeTypes: attributeTypes.get,
+    addAttributeType: attributeTypes.add,
+    updateAttributeType: attributeTypes.update,
+    deleteAttributeType: attributeTypes.remove,
+    getFunctionTypes: functionTypes.get,
+    getFunctionTypesByName: functionTypes.byName,
+    addFunctionType: functionTypes.add,
+    updateFunctionType: functionTypes.update,
+    deleteFunctionType: functionTypes.remove,
 };
@@ -5,9 +5,10 @@ const path = require('path');
 const fs = require('fs').promises;
 const HyperGraph = require('./hyper-graph');
 const GraphManager = require('./graph-manager'); // Import the class
+const { toPublicGraph } = GraphManager;
 const schemaManager = require('./schema-manager');
 const { diffCnl, getNodeOrderFromCnl } = require('./cnl-parser');
-const { evaluate } = require('mathjs');
+const { compile } = require('mathjs');
 const { buildStaticSite } = require('./build-static-site');
 
 const app = express();
@@ -24,6 +25,97 @@ app.use((req, res, next) => {
   next();
 });
 
+// Fixed response bodies and WebSocket messages, serialized once at load
+// instead of on every request.
+const STATIC_BODIES = Object.fromEntries(Object.entries({
+  nameRequired: { error: 'name is required' },
+  graphNotFound: { error: 'Graph not found' },
+  invalidPublicationMode: { error: 'Invalid publication mode' },
+  remoteKeyRequired: { error: 'remoteKey is required' },
+  cnlProcessed: { message: 'CNL processed successfully.' },
+  syncInitiated: { message: 'Sync initiated.' },
+  publishComplete: { type: 'publish-complete', message: 'Static site generated successfully.' },
+}).map(([key, body]) => [key, JSON.stringify(body)]));
+
+// Sends an already serialized JSON body.
+function sendStaticJson(res, status, body) {
+  return res.status(status).type('json').send(body);
+}
+
+// Groups graph items (attributes, functions) by the node they belong to.
+function groupBySource(items) {
+  const bySource = new Map();
+  for (const item of items) {
+    const group = bySource.get(item.source_id);
+    if (group) group.push(item);
+    else bySource.set(item.source_id, [item]);
+  }
+  return bySource;
+}
+
+// Attribute values enter mathjs scopes as numbers whenever they parse as one.
+function addToScope(scope, name, value) {
+  const numericValue = parseFloat(value);
+  scope[name.replace(/\s+/g, '_')] = isNaN(numericValue) ? value : numericValue;
+}
+
+// Function-type expressions compiled once and reused for every node and
+// request. Keyed by function-type name, holding the expression the entry was
+// compiled from; editing a type's expression replaces its entry, so there is
+// at most one compiled expression per function-type name.
+const compiledExpressions = new Map();
+
+function compileExpression(name, expression) {
+  const cached = compiledExpressions.get(name);
+  if (cached && cached.expression === expression) {
+    return cached.compiled;
+  }
+  const sanitizedExpression = expression.replace(/"(.*?)"/g, (match, attrName) => attrName.replace(/\s+/g, '_'));
+  const compiled = compile(sanitizedExpression);
+  compiledExpressions.set(name, { expression, compiled });
+  return compiled;
+}
+
+// Wraps a schema-manager mutation so every schema route shares one success
+// status and one error-to-status mapping. Actions that resolve to nothing
+// (deletes) send an empty body.
+function schemaMutation(action, successStatus, errorStatus) {
+  return async (req, res) => {
+    try {
+      const result = await action(req);
+      if (result === undefined) {
+        res.status(successStatus).send();
+      } else {
+        res.status(successStatus).json(result);
+      }
+    } catch (error) {
+      res.status(errorStatus).json({ error: error.message });
+    }
+  };
+}
+
+// A publish rebuilds the whole public_html tree. Requests that arrive while
+// a build is running are coalesced into a single follow-up build (whose
+// progress goes to the first waiting client) instead of each starting
+// their own, which would also race on the same output directory.
+let currentBuild = null;
+let pendingBuild = null;
+function requestStaticSiteBuild(progressCallback) {
+  if (!currentBuild) {
+    currentBuild = buildStaticSite(progressCallback).finally(() => {
+      currentBuild = null;
+    });
+    return currentBuild;
+  }
+  if (!pendingBuild) {
+    pendingBuild = currentBuild.catch(() => {}).then(() => {
+      pendingBuild = null;
+      return requestStaticSiteBuild(progressCallback);
+    });
+  }
+  return pendingBuild;
+}
+
 async function main() {
   // Create a single instance of the GraphManager
   const graphManager = new GraphManager();
@@ -32,33 +124,33 @@ async function main() {
   const dataPath = process.argv[2] || null;
   // Initialize the instance with the correct path.
   await graphManager.initialize(dataPath);
+  // Warm the schema cache so the first CNL submission or graph fetch does not
+  // pay for reading and parsing every schema file.
+  await schemaManager.getAllSchemas();
 
-  // Attach the initialized instance to the app object
+  // Attach the initialized instance to the app object. Route handlers below
+  // close over `graphManager` directly instead of looking it up per request.
   app.set('graphManager', graphManager);
 
   // --- Graph Management API ---
   app.get('/api/graphs', async (req, res) => {
-    const gm = req.app.get('graphManager'); // Get instance from app
-    const graphs = await gm.getGraphRegistry();
-    res.json(graphs);
+    sendStaticJson(res, 200, await graphManager.getGraphListJson());
   });
 
   app.post('/api/graphs', async (req, res) => {
-    const gm = req.app.get('graphManager'); // Get instance from app
     const { name, author, email } = req.body;
-    if (!name) return res.status(400).json({ error: 'name is required' });
+    if (!name) return sendStaticJson(res, 400, STATIC_BODIES.nameRequired);
     try {
-      const newGraph = await gm.createGraph(name, author, email);
-      res.status(201).json(newGraph);
+      const newGraph = await graphManager.createGraph(name, author, email);
+      res.status(201).json(toPublicGraph(newGraph));
     } catch (error) {
       res.status(409).json({ error: error.message });
     }
   });
 
   app.delete('/api/graphs/:graphId', async (req, res) => {
-    const gm = req.app.get('graphManager'); // Get instance from app
     try {
-      await gm.deleteGraph(req.params.graphId);
+      await graphManager.deleteGraph(req.params.graphId);
       res.status(204).send();
     } catch (error) {
       res.status(404).json({ error: error.message });
@@ -66,89 +158,26 @@ async function main() {
   });
 
   // --- Schema CRUD API ---
-  app.get('/api/schema/relations', async (req, res) => res.json(await schemaManager.getRelationTypes()));
-  app.post('/api/schema/relations', async (req, res) => {
-    try {
-      const newType = await schemaManager.addRelationType(req.body);
-      res.status(201).json(newType);
-    } catch (error) {
-      res.status(409).json({ error: error.message });
-    }
-  });
-  app.put('/api/schema/relations/:name', async (req, res) => {
-    try {
-      const updatedType = await schemaManager.updateRelationType(req.params.name, req.body);
-      res.json(updatedType);
-    } catch (error) {
-      res.status(404).json({ error: error.message });
-    }
-  });
-  app.delete('/api/schema/relations/:name', async (req, res) => {
-    try {
-      await schemaManager.deleteRelationType(req.params.name);
-      res.status(204).send();
-    } catch (error) {
-      res.status(404).json({ error: error.message });
-    }
-  });
-
-  app.get('/api/schema/attributes', async (req, res) => res.json(await schemaManager.getAttributeTypes()));
-  app.post('/api/schema/attributes', async (req, res) => {
-    try {
-      const newType = await schemaManager.addAttributeType(req.body);
-      res.status(201).json(newType);
-    } catch (error) {
-      res.status(409).json({ error: error.message });
-    }
-  });
-  app.put('/api/schema/attributes/:name', async (req, res) => {
-    try {
-      const updatedType = await schemaManager.updateAttributeType(req.params.name, req.body);
-      res.json(updatedType);
-    } catch (error) {
-      res.status(404).json({ error: error.message });
-    }
-  });
-  app.delete('/api/schema/attributes/:name', async (req, res) => {
-    try {
-      await schemaManager.deleteAttributeType(req.params.name);
-      res.status(204).send();
-    } catch (error) {
-      res.status(404).json({ error: error.message });
-    }
-  });
-
+  const schemaRoutes = {
+    relations: schemaManager.relationTypes,
+    attributes: schemaManager.attributeTypes,
+    functions: schemaManager.functionTypes,
+  };
+  for (const [segment, crud] of Object.entries(schemaRoutes)) {
+    app.get(`/api/schema/${segment}`, async (req, res) => res.json(await crud.get()));
+    app.post(`/api/schema/${segment}`, schemaMutation(req => crud.add(req.body), 201, 409));
+    app.put(`/api/schema/${segment}/:name`, schemaMutation(req => crud.update(req.params.name, req.body), 200, 404));
+    app.delete(`/api/schema/${segment}/:name`, schemaMutation(req => crud.remove(req.params.name), 204, 404));
+  }
   app.get('/api/schema/nodetypes', async (req, res) => res.json(await schemaManager.getNodeTypes()));
-  app.get('/api/schema/functions', async (req, res) => res.json(await schemaManager.getFunctionTypes()));
-  app.post('/api/schema/functions', async (req, res) => {
-    try {
-      const newType = await schemaManager.addFunctionType(req.body);
-      res.status(201).json(newType);
-    } catch (error) {
-      res.status(409).json({ error: error.message });
-    }
-  });
-  app.put('/api/schema/functions/:name', async (req, res) => {
-    try {
-      const updatedType = await schemaManager.updateFunctionType(req.params.name, req.body);
-      res.json(updatedType);
-    } catch (error) {
-      res.status(404).json({ error: error.message });
-    }
-  });
-  app.delete('/api/schema/functions/:name', async (req, res) => {
-    try {
-      await schemaManager.deleteFunctionType(req.params.name);
-      res.status(204).send();
-    } catch (error) {
-      res.status(404).json({ error: error.message });
-    }
-  });
+  // Every schema kind in one response, so views that need all of them make a
+  // single request. Express's default ETag lets unchanged schemas revalidate
+  // with a 304.
+  app.get('/api/schema/all', async (req, res) => res.json(await schemaManager.getAllSchemas()));
 
   // --- Node Registry API ---
   app.get('/api/noderegistry', async (req, res) => {
-      const gm = req.app.get('graphManager');
-      res.json(await gm.getNodeRegistry())
+      res.json(await graphManager.getNodeRegistry())
     });
 
 
@@ -156,20 +185,19 @@ async function main() {
 
   // Middleware to load the correct graph
   const loadGraph = async (req, res, next) => {
-    const gm = req.app.get('graphManager');
     try {
       // Inject the HyperGraph dependency here
-      req.graph = await gm.getGraph(req.params.graphId, HyperGraph);
+      req.graph = await graphManager.getGraph(req.params.graphId, HyperGraph);
       next();
     } catch (error) {
-      res.status(404).json({ error: 'Graph not found' });
+      sendStaticJson(res, 404, STATIC_BODIES.graphNotFound);
     }
   };
 
   app.put('/api/graphs/:graphId/nodes/:nodeId/publication', loadGraph, async (req, res) => {
     const { publication_mode } = req.body;
     if (!['Private', 'P2P', 'Public'].includes(publication_mode)) {
-      return res.status(400).json({ error: 'Invalid publication mode' });
+      return sendStaticJson(res, 400, STATIC_BODIES.invalidPublicationMode);
     }
     try {
       const updatedNode = await req.graph.updateNode(req.params.nodeId, { publication_mode });
@@ -182,7 +210,7 @@ async function main() {
   app.put('/api/graphs/:graphId/publish/all', loadGraph, async (req, res) => {
     const { publication_mode } = req.body;
     if (!['P2P', 'Public'].includes(publication_mode)) {
-      return res.status(400).json({ error: 'Invalid publication mode' });
+      return sendStaticJson(res, 400, STATIC_BODIES.invalidPublicationMode);
     }
     try {
       const allNodes = await req.graph.listAll('nodes');
@@ -202,56 +230,70 @@ async function main() {
   });
 
   app.get('/api/graphs/:graphId/graph', loadGraph, async (req, res) => {
-    const gm = req.app.get('graphManager');
     const graphId = req.params.graphId;
-    const nodesFromDb = await req.graph.listAll('nodes');
-    const relations = await req.graph.listAll('relations');
-    const attributes = await req.graph.listAll('attributes');
-    const transitions = await req.graph.listAll('transitions');
-    const functions = await req.graph.listAll('functions');
-    const functionTypes = await schemaManager.getFunctionTypes();
-
-    const allNodesFromDb = [...nodesFromDb, ...transitions].filter(node => !node.isDeleted);
-
-    // Get node order from CNL
-    const cnl = await gm.getCnl(graphId);
-    const orderedNodeIds = getNodeOrderFromCnl(cnl);
-    const nodesMap = new Map(allNodesFromDb.map(node => [node.id, node]));
-
-    // Sort nodes according to CNL order
-    const sortedNodes = orderedNodeIds.map(id => nodesMap.get(id)).filter(Boolean);
-    const nodesInCnl = new Set(orderedNodeIds);
-    const nodesNotInCnl = allNodesFromDb.filter(node => !nodesInCnl.has(node.id));
-    const finalNodeOrder = [...sortedNodes, ...nodesNotInCnl];
+    const [nodesFromDb, relations, attributes, transitions, functions, functionTypesByName, cnl] = await Promise.all([
+      req.graph.listAll('nodes'),
+      req.graph.listAll('relations'),
+      req.graph.listAll('attributes'),
+      req.graph.listAll('transitions'),
+      req.graph.listAll('functions'),
+      schemaManager.getFunctionTypesByName(),
+      graphManager.getCnl(graphId),
+    ]);
+
+    const nodesMap = new Map();
+    for (const node of nodesFromDb) {
+      if (!node.isDeleted) nodesMap.set(node.id, node);
+    }
+    for (const node of transitions) {
+      if (!node.isDeleted) nodesMap.set(node.id, node);
+    }
+
+    // Sort nodes according to CNL order; whatever is left in the map was not
+    // mentioned in the CNL and keeps its storage order at the end.
+    const finalNodeOrder = [];
+    for (const id of getNodeOrderFromCnl(cnl)) {
+      const node = nodesMap.get(id);
+      if (node) {
+        finalNodeOrder.push(node);
+        nodesMap.delete(id);
+      }
+    }
+    finalNodeOrder.push(...nodesMap.values());
 
     const activeRelations = relations.filter(rel => !rel.isDeleted);
     let activeAttributes = attributes.filter(attr => !attr.isDeleted);
 
     // Compute derived attributes
+    const functionsBySource = groupBySource(functions);
+    const attributesBySource = groupBySource(activeAttributes);
     for (const node of finalNodeOrder) {
-      const nodeFunctions = functions.filter(f => f.source_id === node.id);
+      const nodeFunctions = functionsBySource.get(node.id);
+      if (!nodeFunctions) continue;
+
+      // Built once per node and extended with each derived value, so later
+      // functions still see the results of earlier ones.
+      const nodeScope = {};
+      for (const attr of attributesBySource.get(node.id) || []) {
+        addToScope(nodeScope, attr.name, attr.value);
+      }
+
       for (const func of nodeFunctions) {
-        const funcType = functionTypes.find(ft => ft.name === func.name);
+        const funcType = functionTypesByName.get(func.name);
         if (!funcType) continue;
 
-        const scope = {};
-        const nodeAttributes = activeAttributes.filter(a => a.source_id === node.id);
-        for (const attr of nodeAttributes) {
-          const numericValue = parseFloat(attr.value);
-          scope[attr.name.replace(/\s+/g, '_')] = isNaN(numericValue) ? attr.value : numericValue;
-        }
-
         try {
-          const sanitizedExpression = funcType.expression.replace(/"(.*?)"/g, (match, attrName) => attrName.replace(/\s+/g, '_'));
-          const value = evaluate(sanitizedExpression, scope);
-          activeAttributes.push({
+          const value = compileExpression(funcType.name, funcType.expression).evaluate({ ...nodeScope });
+          const derivedAttribute = {
             id: `derived_${func.id}`,
             source_id: func.source_id,
             name: func.name,
             value: String(value),
             isDerived: true,
             morph_ids: func.morph_ids,
-          });
+          };
+          activeAttributes.push(derivedAttribute);
+          addToScope(nodeScope, derivedAttribute.name, derivedAttribute.value);
         } catch (error) {
           // Silently fail for now, or add logging
         }
@@ -262,9 +304,8 @@ async function main() {
   });
 
   app.get('/api/graphs/:graphId/cnl', async (req, res) => {
-    const gm = req.app.get('graphManager');
     try {
-      const cnl = await gm.getCnl(req.params.graphId);
+      const cnl = await graphManager.getCnl(req.params.graphId);
       res.json({ cnl });
     } catch (error) {
       res.status(404).json({ error: error.message });
@@ -272,9 +313,8 @@ async function main() {
   });
 
   app.get('/api/graphs/:graphId/nodes/:nodeId/cnl', async (req, res) => {
-    const gm = req.app.get('graphManager');
     try {
-      const cnl = await gm.getNodeCnl(req.params.graphId, req.params.nodeId);
+      const cnl = await graphManager.getNodeCnl(req.params.graphId, req.params.nodeId);
       res.json({ cnl });
     } catch (error) {
       res.status(404).json({ error: error.message });
@@ -282,12 +322,14 @@ async function main() {
   });
 
   app.post('/api/graphs/:graphId/cnl', loadGraph, async (req, res) => {
-    const gm = req.app.get('graphManager');
     const { cnlText } = req.body;
     const graph = req.graph;
     const graphId = req.params.graphId;
+    // Graph metadata changes are written along with the CNL by saveCnl, in a
+    // single registry update.
+    const graphMetadata = {};
 
-    const { operations, errors } = await diffCnl(await gm.getCnl(graphId), cnlText);
+    const { operations, errors } = await diffCnl(await graphManager.getCnl(graphId), cnlText);
 
     if (errors.length > 0) {
       return res.status(422).json({ errors });
@@ -310,7 +352,12 @@ async function main() {
           }
         }
       }
-      // Second pass: additions
+      // Second pass: additions. Node registry changes are collected and
+      // written once afterwards rather than rewriting the file per node, and
+      // attributes are grouped by node and stored in one batch per node.
+      const newRegistryNodes = [];
+      const graphNodeIds = [];
+      const attributeAdditions = [];
       for (const op of operations) {
         if (op.type.startsWith('add')) {
           switch (op.type) {
@@ -318,43 +365,48 @@ async function main() {
               const existingNode = await graph.getNode(op.payload.options.id);
               if (!existingNode) {
                 await req.graph.addNode(op.payload.base_name, op.payload.options);
-                await gm.addNodeToRegistry({ id: op.payload.options.id, ...op.payload });
+                newRegistryNodes.push({ id: op.payload.options.id, ...op.payload });
               }
-              await gm.registerNodeInGraph(op.payload.options.id, graphId);
+              graphNodeIds.push(op.payload.options.id);
               break;
             case 'addRelation':
               const targetNode = await graph.getNode(op.payload.target);
               if (!targetNode) {
                 await graph.addNode(op.payload.target, { id: op.payload.target });
-                await gm.addNodeToRegistry({ id: op.payload.target, base_name: op.payload.target });
+                newRegistryNodes.push({ id: op.payload.target, base_name: op.payload.target });
               }
-              await gm.registerNodeInGraph(op.payload.target, graphId);
+              graphNodeIds.push(op.payload.target);
               await req.graph.addRelation(op.payload.source, op.payload.target, op.payload.name, op.payload.options);
               break;
             case 'addAttribute':
-              await req.graph.addAttribute(op.payload.source, op.payload.name, op.payload.value, op.payload.options);
+              const { source, name, value, options } = op.payload;
+              attributeAdditions.push({ source_id: source, name, value, options });
               break;
           }
         }
       }
+      for (const [source, attributes] of groupBySource(attributeAdditions)) {
+        await req.graph.addAttributes(source, attributes);
+      }
+      await graphManager.registerNodesInGraph(graphId, graphNodeIds, newRegistryNodes);
       // Third pass: updates and functions
       for (const op of operations) {
         if (op.type === 'updateNode') {
           await req.graph.updateNode(op.payload.id, op.payload.fields);
         } else if (op.type === 'applyFunction') {
-          const functionTypes = await schemaManager.getFunctionTypes();
-          const funcType = functionTypes.find(ft => ft.name === op.payload.name);
+          const functionTypesByName = await schemaManager.getFunctionTypesByName();
+          const funcType = functionTypesByName.get(op.payload.name);
           if (funcType) {
             await req.graph.applyFunction(op.payload.source, op.payload.name, funcType.expression, op.payload.options);
           }
         } else if (op.type === 'updateGraphDescription') {
-            await gm.updateGraphMetadata(graphId, { description: op.payload.description });
+            graphMetadata.description = op.payload.description;
         }
       }
     }
 
-    await gm.saveCnl(req.params.graphId, cnlText);
-    res.status(200).json({ message: 'CNL processed successfully.' });
+    await graphManager.saveCnl(req.params.graphId, cnlText, graphMetadata);
+    sendStaticJson(res, 200, STATIC_BODIES.cnlProcessed);
   });
 
   // --- Peer Management API ---
@@ -365,10 +417,10 @@ async function main() {
 
   app.post('/api/graphs/:graphId/peers/sync', loadGraph, async (req, res) => {
     const { remoteKey } = req.body;
-    if (!remoteKey) return res.status(400).json({ error: 'remoteKey is required' });
+    if (!remoteKey) return sendStaticJson(res, 400, STATIC_BODIES.remoteKeyRequired);
     try {
       await req.graph.syncWithPeer(remoteKey);
-      res.status(200).json({ message: 'Sync initiated.' });
+      sendStaticJson(res, 200, STATIC_BODIES.syncInitiated);
     } catch (error) {
       res.status(500).json({ error: error.message });
     }
@@ -387,8 +439,8 @@ async function main() {
           };
 
           try {
-            await buildStaticSite(progressCallback);
-            ws.send(JSON.stringify({ type: 'publish-complete', message: 'Static site generated successfully.' }));
+            await requestStaticSiteBuild(progressCallback);
+            ws.send(STATIC_BODIES.publishComplete);
           } catch (error) {
             console.error('Error generating static site:', error);
             ws.send(JSON.stringify({ type: 'publish-error', message: `Failed to generate static site: ${error.message}` }));
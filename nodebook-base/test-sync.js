@@ -1,3 +1,4 @@
+const fs = require('fs');
 const { HyperGraph } = require('./hyper-graph');
 
 async function testSync() {
@@ -43,9 +44,8 @@ async function testSync() {
   edgesB.forEach(e => console.log(`- ${e.source} -> ${e.target}`));
 
   // 6. Clean up the test databases
-  const fs = require('fs').promises;
-  await fs.rm('./db-peer-a', { recursive: true, force: true });
-  await fs.rm('./db-peer-b', { recursive: true, force: true });
+  await fs.promises.rm('./db-peer-a', { recursive: true, force: true });
+  await fs.promises.rm('./db-peer-b', { recursive: true, force: true });
   console.log('\nCleanup complete.');
 
   if (nodesB.length === 2 && edgesB.length === 1) {
@@ -57,7 +57,6 @@ async function testSync() {
 
 // We need to modify HyperGraph.create to accept a path and key
 async function patchHyperGraph() {
-    const fs = require('fs');
     let content = fs.readFileSync('./hyper-graph.js', 'utf8');
     content = content.replace(
         `static async create() {
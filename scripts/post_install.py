@@ -30,15 +30,17 @@ def create_admin_user():
     username = "admin"
     email = "admin@example.com"
     password = "admin123"  # Change as needed
-    pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
-    hashed_password = pwd_context.hash(password)
-    now = datetime.utcnow()
 
     with Session(engine) as session:
-        existing = session.exec(select(User).where(User.username == username)).first()
-        if existing:
+        # Only the primary key is needed to know the admin exists; the
+        # password is hashed only when a user is actually created.
+        existing = session.exec(select(User.id).where(User.username == username)).first()
+        if existing is not None:
             print(f"[INFO] Admin user '{username}' already exists.")
             return
+        pwd_context = CryptContext(schemes=["argon2", "bcrypt"], deprecated="auto")
+        hashed_password = pwd_context.hash(password)
+        now = datetime.utcnow()
         user = User(
             id=uuid4(),
             username=username,